@@ -7,84 +7,106 @@ the number of mutual friends two users share.
 Usage: python question_1.py [input_file] [output_file]
 """
 
+import heapq
 import sys
-from collections import defaultdict
+from array import array
+from collections import Counter, defaultdict
+from itertools import combinations
+from operator import neg
 
 
-def mapper(user, friend_list):
+def load_adjacency(path):
+    """
+    Read the adjacency list into CSR form: parallel int arrays `users`
+    (one entry per input line), `indptr` (row offsets) and `neighbors`,
+    so the friends of users[k] are neighbors[indptr[k]:indptr[k + 1]].
+    """
+    users = array("i")
+    indptr = array("q", [0])
+    neighbors = array("i")
+    # Parse raw bytes: int() accepts them directly, which skips decoding
+    # every line to str before splitting it.
+    with open(path, "rb") as f:
+        for line in f:
+            user, _, friends = line.strip().partition(b"\t")
+            if not user:
+                continue
+            users.append(int(user))
+            if friends:
+                neighbors.extend(map(int, friends.split(b",")))
+            indptr.append(len(neighbors))
+    return users, indptr, neighbors
+
+
+def mapper(user, friend_list, pair_counts):
     """
     Map phase: For each user U with friends F = [f1, f2, ..., fn]:
-    - Emit (fi, (fj, 1)) and (fj, (fi, 1)) for each pair (fi, fj) in F,
-      meaning fi and fj share U as a mutual friend.
-    - Emit (U, (fi, -1)) for each fi in F to mark existing friendships.
+    - Emit ((min(fi, fj), max(fi, fj)), 1) for each pair (fi, fj) in F,
+      meaning fi and fj share U as a mutual friend. Only one direction
+      is emitted; the shuffle mirrors each pair to both users.
+
+    Emissions are summed straight into the global `pair_counts` Counter,
+    so the aggregation across all users runs in C. Existing friendships
+    need no marker emissions: they are exactly U's own friend list.
     """
-    emissions = []
-    for fi in friend_list:
-        emissions.append((user, (fi, -1)))
+    pair_counts.update(combinations(sorted(friend_list), 2))
 
-    for i in range(len(friend_list)):
-        for j in range(i + 1, len(friend_list)):
-            fi, fj = friend_list[i], friend_list[j]
-            emissions.append((fi, (fj, 1)))
-            emissions.append((fj, (fi, 1)))
 
-    return emissions
+def map_rows(users, indptr, neighbors):
+    """Run the mapper over every row of the CSR graph."""
+    pair_counts = Counter()
+    for row, user in enumerate(users):
+        mapper(user, neighbors[indptr[row]:indptr[row + 1]], pair_counts)
+    return pair_counts
 
 
-def reducer(user, values):
+def reducer(user, mutual_counts, existing_friends):
     """
-    Reduce phase: For each user, aggregate mutual friend counts and
-    filter out existing friends. Return top 10 recommendations sorted
+    Reduce phase: For each user, take the aggregated mutual friend counts
+    and filter out existing friends. Return top 10 recommendations sorted
     by mutual friend count (desc), then user ID (asc) for ties.
     """
-    existing_friends = set()
-    mutual_counts = defaultdict(int)
-
-    for candidate, count in values:
-        if count == -1:
-            existing_friends.add(candidate)
-        else:
-            mutual_counts[candidate] += count
-
     for friend in existing_friends:
         mutual_counts.pop(friend, None)
 
-    sorted_recs = sorted(mutual_counts.items(), key=lambda x: (-x[1], x[0]))
-    return [uid for uid, _ in sorted_recs[:10]]
+    # Select on (-count, uid) tuples built by zip/map, so the partial
+    # selection compares in C without a Python key callback per candidate.
+    ranked = zip(map(neg, mutual_counts.values()), mutual_counts.keys())
+    return [uid for _, uid in heapq.nsmallest(10, ranked)]
 
 
 def main():
     input_file = sys.argv[1] if len(sys.argv) > 1 else "data/soc-LiveJournal1Adj.txt"
     output_file = sys.argv[2] if len(sys.argv) > 2 else None
 
-    adjacency = {}
-    with open(input_file, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            parts = line.split("\t")
-            user = int(parts[0])
-            if len(parts) > 1 and parts[1]:
-                friend_list = list(map(int, parts[1].split(",")))
-            else:
-                friend_list = []
-            adjacency[user] = friend_list
+    users, indptr, neighbors = load_adjacency(input_file)
 
     # Map phase
-    intermediate = defaultdict(list)
-    for user, friend_list in adjacency.items():
-        for key, value in mapper(user, friend_list):
-            intermediate[key].append(value)
+    pair_counts = map_rows(users, indptr, neighbors)
+
+    # Shuffle: group the globally aggregated counts by user. Pairs are
+    # emitted once as (low, high), so each count goes to both users.
+    intermediate = defaultdict(dict)
+    for (low, high), count in pair_counts.items():
+        counts = intermediate[low]
+        counts[high] = counts.get(high, 0) + count
+        counts = intermediate[high]
+        counts[low] = counts.get(low, 0) + count
 
     # Reduce phase
+    row_of = {user: row for row, user in enumerate(users)}
     results = {}
     for user in sorted(intermediate.keys()):
-        recs = reducer(user, intermediate[user])
+        row = row_of.get(user)
+        if row is not None:
+            existing_friends = neighbors[indptr[row]:indptr[row + 1]]
+        else:
+            existing_friends = []
+        recs = reducer(user, intermediate[user], existing_friends)
         results[user] = recs
 
     # Also include users with no recommendations
-    for user in adjacency:
+    for user in users:
         if user not in results:
             results[user] = []
 
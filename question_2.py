@@ -1,5 +1,7 @@
-from itertools import combinations
-from collections import defaultdict
+import heapq
+from array import array
+from itertools import combinations, compress
+from collections import Counter, defaultdict
 
 MIN_SUPPORT = 100
 TOP_K = 5
@@ -18,33 +20,84 @@ def load_transactions(path: str):
 
 def apriori_L1(transactions):
     """Return item support dict and L1 as sorted list of frequent items."""
-    item_sup = defaultdict(int)
+    item_sup = Counter()
     for t in transactions:
-        for x in t:
-            item_sup[x] += 1
+        item_sup.update(t)
     L1 = sorted([x for x, c in item_sup.items() if c >= MIN_SUPPORT])
     return item_sup, L1
 
-def apriori_L2(transactions, L1):
+def encode_transactions(transactions, L1):
     """
-    Generate candidate pairs C2 from frequent items L1 and count supports by scanning.
+    Encode transactions as a CSR int32 matrix over L1 item ids (index in sorted L1).
+    Transaction k is items[indptr[k]:indptr[k+1]], sorted; infrequent items are dropped.
+    Returns the item -> id mapping alongside indptr and items.
+    """
+    item_id = {x: i for i, x in enumerate(L1)}
+    indptr = array("q", [0])
+    items = array("i")
+    for t in transactions:
+        # filter and map to ids in one pass, then sort the small ints in place:
+        # ids follow L1 order, so no string comparisons are needed
+        ids = [item_id[x] for x in t if x in item_id]
+        ids.sort()
+        items.extend(ids)
+        indptr.append(len(items))
+    return item_id, indptr, items
+
+def pair_offsets(n):
+    """Row offsets into the upper-triangle pair table: pair (a, b) of ids a < b is slot offsets[a] + b."""
+    return [a * n - a * (a + 1) // 2 - a - 1 for a in range(n)]
+
+def count_pairs(indptr, items, n):
+    """
+    Counting kernel: support of every id pair (a, b), a < b, over CSR transactions.
+    Returns a flat int table of n*(n-1)/2 slots laid out by pair_offsets(n).
+    """
+    offsets = pair_offsets(n)
+    counts = array("q", [0]) * (n * (n - 1) // 2)
+    for k in range(len(indptr) - 1):
+        ids = items[indptr[k]:indptr[k + 1]]
+        for i, a in enumerate(ids):
+            row = offsets[a]
+            for b in ids[i + 1:]:
+                counts[row + b] += 1
+    return counts
+
+def count_triples(indptr, items, by_first3, triple_items):
+    """
+    Counting kernel: support of candidate id triples over CSR transactions.
+    by_first3 maps a first id to its candidate (b, c) tails; triple_items holds every
+    id used by a candidate. Returns a Counter keyed by id triple.
+    """
+    triple_sup = Counter()
+    for k in range(len(indptr) - 1):
+        ft = [x for x in items[indptr[k]:indptr[k + 1]] if x in triple_items]
+        for i, a in enumerate(ft):
+            tails = by_first3.get(a)
+            if tails is None:
+                continue
+            triple_sup.update([(a,) + bc for bc in combinations(ft[i + 1:], 2) if bc in tails])
+    return triple_sup
+
+def apriori_L2(indptr, items, L1):
+    """
+    Count supports of candidate pairs C2 (pairs of frequent items L1) by scanning
+    the CSR-encoded transactions.
     Return pair support dict (for ALL counted pairs in C2) and L2 set of frequent pairs.
     """
-    # C2 candidates from L1
-    L1_set = set(L1)
-    C2 = set()
-    for a, b in combinations(L1, 2):
-        C2.add((a, b))
+    # The CSR only holds L1 item ids, so every pair counted is in C2 by
+    # construction and C2 is never built. L1 is sorted, so sorted ids give
+    # sorted pairs.
+    n = len(L1)
+    counts = count_pairs(indptr, items, n)
 
+    # Decode the pairs that actually occurred back to item tuples
     pair_sup = defaultdict(int)
-
-    # Scan transactions once, only count pairs whose both items in L1
-    for t in transactions:
-        ft = sorted([x for x in t if x in L1_set])
-        for a, b in combinations(ft, 2):
-            p = (a, b)
-            if p in C2:
-                pair_sup[p] += 1
+    offsets = pair_offsets(n)
+    for a in range(n):
+        start = offsets[a] + a + 1
+        for b in compress(range(a + 1, n), counts[start:start + n - a - 1]):
+            pair_sup[(L1[a], L1[b])] = counts[offsets[a] + b]
 
     L2 = set([p for p, c in pair_sup.items() if c >= MIN_SUPPORT])
     return pair_sup, L2
@@ -55,52 +108,56 @@ def apriori_C3_from_L2(L2):
     Classic join: (a,b) and (a,c) -> (a,b,c) with b<c
     Prune: all 2-subsets of triple must be in L2.
     """
-    # index pairs by first item
-    by_first = defaultdict(set)
+    L2_set = frozenset(L2)
+
+    # index pairs by first item, each bucket sorted once up front
+    by_first = defaultdict(list)
     for a, b in L2:
-        by_first[a].add(b)
+        by_first[a].append(b)
+    by_first_sorted = {a: sorted(bs) for a, bs in by_first.items()}
 
     C3 = set()
-    for a, bs in by_first.items():
-        bs = sorted(bs)
+    for a, bs in by_first_sorted.items():
         for b, c in combinations(bs, 2):
-            triple = (a, b, c)  # already sorted because a < b < c in our representation
-            # prune: all pairs must be frequent
-            if (a, b) in L2 and (a, c) in L2 and (b, c) in L2:
-                C3.add(triple)
+            # prune: all pairs must be frequent; (a, b) and (a, c) are in L2
+            # by construction of the bucket, so only (b, c) needs checking
+            if (b, c) in L2_set:
+                C3.add((a, b, c))  # already sorted because a < b < c in our representation
 
     return C3
 
-def apriori_L3(transactions, C3):
-    """Count supports for candidate triples C3 by scanning transactions; return triple_sup and L3."""
+def apriori_L3(indptr, items, L1, item_id, C3):
+    """Count supports for candidate triples C3 by scanning CSR transactions; return triple_sup and L3."""
     triple_sup = defaultdict(int)
     if not C3:
         return triple_sup, set()
 
-    # For fast subset checks: group candidates by their first item
-    # But simplest: scan transaction triples and check membership in C3 (works fine usually)
-    C3_set = set(C3)
-    for t in transactions:
-        ft = sorted(t)
-        for tri in combinations(ft, 3):
-            if tri in C3_set:
-                triple_sup[tri] += 1
+    # For fast subset checks: group candidates (as item ids) by their first item,
+    # and drop transaction items that appear in no candidate before enumerating
+    by_first3 = defaultdict(set)
+    for x, y, z in C3:
+        by_first3[item_id[x]].add((item_id[y], item_id[z]))
+    triple_items = frozenset(item_id[x] for tri in C3 for x in tri)
+
+    for (a, b, c), cnt in count_triples(indptr, items, by_first3, triple_items).items():
+        triple_sup[(L1[a], L1[b], L1[c])] = cnt
 
     L3 = set([tri for tri, c in triple_sup.items() if c >= MIN_SUPPORT])
     return triple_sup, L3
 
 def top5_part_d(item_sup, pair_sup, L2):
     """Part (d): rules X=>Y and Y=>X for frequent pairs. Sort by conf desc; tie by LHS lexicographically."""
-    rules = []  # (conf, lhs, rhs, sup_xy)
+    rules = []  # (-conf, lhs, rhs, sup_xy)
 
     for (a, b) in L2:
         sup_ab = pair_sup[(a, b)]
-        rules.append((sup_ab / item_sup[a], a, b, sup_ab))
-        rules.append((sup_ab / item_sup[b], b, a, sup_ab))
+        rules.append((-sup_ab / item_sup[a], a, b, sup_ab))
+        rules.append((-sup_ab / item_sup[b], b, a, sup_ab))
 
-    # confidence desc, lhs lexicographically increasing (extra rhs for deterministic)
-    rules.sort(key=lambda r: (-r[0], r[1], r[2]))
-    return rules[:TOP_K]
+    # confidence desc, lhs lexicographically increasing (extra rhs for deterministic);
+    # rules are stored in that order already, so the tuples compare in C with no key
+    top = heapq.nsmallest(TOP_K, rules)
+    return [(-neg_conf, lhs, rhs, sup) for neg_conf, lhs, rhs, sup in top]
 
 def top5_part_e(pair_sup, triple_sup, L3):
     """
@@ -109,23 +166,24 @@ def top5_part_e(pair_sup, triple_sup, L3):
     confidence = support(x,y,z)/support(pair)
     Sort by confidence desc; then order LHS pair lexicographically; tie by first then second item in pair.
     """
-    rules = []  # (conf, (lhs1,lhs2), rhs, sup_xyz)
+    rules = []  # (-conf, (lhs1,lhs2), rhs, sup_xyz)
 
     for (x, y, z) in L3:
         sup_xyz = triple_sup[(x, y, z)]
-        rules.append((sup_xyz / pair_sup[(x, y)], (x, y), z, sup_xyz))
-        rules.append((sup_xyz / pair_sup[(x, z)], (x, z), y, sup_xyz))
-        rules.append((sup_xyz / pair_sup[(y, z)], (y, z), x, sup_xyz))
+        rules.append((-sup_xyz / pair_sup[(x, y)], (x, y), z, sup_xyz))
+        rules.append((-sup_xyz / pair_sup[(x, z)], (x, z), y, sup_xyz))
+        rules.append((-sup_xyz / pair_sup[(y, z)], (y, z), x, sup_xyz))
 
-    rules.sort(key=lambda r: (-r[0], r[1][0], r[1][1], r[2]))
-    return rules[:TOP_K]
+    top = heapq.nsmallest(TOP_K, rules)
+    return [(-neg_conf, lhs, rhs, sup) for neg_conf, lhs, rhs, sup in top]
 
 def main():
     transactions = load_transactions(DATA_PATH)
     item_sup, L1 = apriori_L1(transactions)
-    pair_sup, L2 = apriori_L2(transactions, L1)
+    item_id, indptr, items = encode_transactions(transactions, L1)
+    pair_sup, L2 = apriori_L2(indptr, items, L1)
     C3 = apriori_C3_from_L2(L2)
-    triple_sup, L3 = apriori_L3(transactions, C3)
+    triple_sup, L3 = apriori_L3(indptr, items, L1, item_id, C3)
 
     print("===== (d) Top 5 rules from frequent pairs =====")
     d_rules = top5_part_d(item_sup, pair_sup, L2)